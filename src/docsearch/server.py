@@ -1,7 +1,17 @@
+import datetime
 import logging
+import multiprocessing
+import os
 import re
 import sys
 import zipfile
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from itertools import groupby, islice
+from operator import itemgetter
 from pathlib import Path
 from xml.etree import ElementTree
 
@@ -15,168 +25,608 @@ logger = logging.getLogger("docsearch")
 mcp = FastMCP("docsearch")
 
 SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".pptx", ".xlsx", ".odt", ".ods", ".odp", ".rtf", ".epub"}
+LINE_RANGE_EXTENSIONS = {".docx", ".odt", ".rtf"}
+SHEET_EXTENSIONS = {".xlsx", ".ods"}
 MAX_OUTPUT_CHARS = 40_000
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_CHARS = 2_000_000
+CACHE_MAX_TOTAL_CHARS = 32_000_000
+EPUB_READ_CHUNK = 64 * 1024
+OPF_ITEM_TAG = "{http://www.idpf.org/2007/opf}item"
+OPF_ITEMREF_TAG = "{http://www.idpf.org/2007/opf}itemref"
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+WORKERS_ENV = "DOCSEARCH_WORKERS"
+XLSX_READER_ENV = "DOCSEARCH_XLSX_READER"
+LINE_SCOPED_PATTERN_RE = re.compile(r"\(\?<?!|\\[AZzsWDn]|\\x0[aA]|\[\^|\(\?[a-zA-Z-]*s|\n")
+HYPERSCAN_UNSAFE_PATTERN_RE = re.compile(r"\{,|\[:|\\[AZzsS]")
+REGEX_METACHAR_RE = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+_section_cache: OrderedDict[tuple[str, int, int], tuple[tuple[tuple[str, str], ...], int]] = OrderedDict()
+_section_cache_chars = 0
+_executor: tuple[int, ProcessPoolExecutor] | None = None
+
+
+def nonblank_lines(label: str, text: str) -> Iterator[tuple[str, str]]:
+    for line in text.splitlines():
+        if line and not line.isspace():
+            yield label, line
+
+
+class RangeSelection:
+    # docread's range, parsed before extraction so extractors can skip sections that filter_sections would drop.
+    def __init__(self, range_str: str, ext: str):
+        self.ext = ext
+        self.numbers: set[int] = set()
+        self.sheet_names: set[str] = set()
+        self.sheet_indices: set[int] = set()
+        self.line_range: set[int] | None = None
+
+        if ext in LINE_RANGE_EXTENSIONS:
+            self.line_range = parse_numeric_range(range_str)
+        elif ext in SHEET_EXTENSIONS:
+            for part in range_str.split(","):
+                part = part.strip().strip("'\"")
+                if ":" in part:
+                    sheet_part, row_part = part.split(":", 1)
+                    self.line_range = parse_numeric_range(row_part)
+                    part = sheet_part
+                try:
+                    self.sheet_indices.add(int(part))
+                except ValueError:
+                    if "-" not in part:
+                        self.sheet_names.add(part)
+                    else:
+                        try:
+                            self.sheet_indices |= parse_numeric_range(part)
+                        except ValueError:
+                            self.sheet_names.add(part)
+        else:
+            self.numbers = parse_numeric_range(range_str)
+
+    @property
+    def line_limit(self) -> int | None:
+        return max(self.line_range, default=0) if self.line_range is not None else None
 
 
-def extract_pdf(path: Path) -> list[tuple[str, str]]:
+def select_numbered(items: Iterable, selection: RangeSelection | None) -> Iterator[tuple[int, object]]:
+    last = max(selection.numbers, default=0) if selection is not None else None
+    for i, item in enumerate(items, 1):
+        if selection is not None:
+            if i > last:
+                return
+            if i not in selection.numbers:
+                continue
+        yield i, item
+
+
+def select_sheets(sheets: Iterable[tuple[str, Iterator[tuple[str, str]]]], selection: RangeSelection | None) -> Iterator[tuple[str, str]]:
+    # Sheet indices count non-empty sheets, so unselected sheets before the highest index are read up to their first line.
+    if selection is None:
+        for _, lines in sheets:
+            yield from lines
+        return
+    names_left = set(selection.sheet_names)
+    last_index = max(selection.sheet_indices, default=0)
+    ordinal = 0
+    for name, lines in sheets:
+        if not names_left and ordinal >= last_index:
+            return
+        if name in names_left or ordinal + 1 in selection.sheet_indices:
+            names_left.discard(name)
+            empty = True
+            for item in islice(lines, selection.line_limit):
+                empty = False
+                yield item
+            if not empty:
+                ordinal += 1
+        elif ordinal < last_index and next(lines, None) is not None:
+            ordinal += 1
+
+
+def iter_lines_pdf(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     import pymupdf
-    sections = []
     with pymupdf.open(str(path)) as doc:
-        for i, page in enumerate(doc, 1):
-            text = page.get_text("text").strip()
-            if text:
-                sections.append((f"page {i}", text))
-    return sections
+        if selection is None:
+            pages = enumerate(doc, 1)
+        else:
+            pages = ((i, doc.load_page(i - 1)) for i in sorted(selection.numbers) if 1 <= i <= doc.page_count)
+        for i, page in pages:
+            yield from nonblank_lines(f"page {i}", page.get_text("text"))
 
 
-def extract_docx(path: Path) -> list[tuple[str, str]]:
-    from docx import Document
-    doc = Document(str(path))
+def docx_paragraph_text(p) -> str:
+    # Same run content python-docx's Paragraph.text reads: runs and runs inside hyperlinks.
     parts = []
-    for para in doc.paragraphs:
-        if para.text.strip():
-            parts.append(para.text)
-    for table in doc.tables:
-        for row in table.rows:
-            cells = [cell.text.strip() for cell in row.cells]
-            line = "\t".join(cells)
-            if line.strip():
-                parts.append(line)
-    if parts:
-        return [("document", "\n".join(parts))]
-    return []
-
-
-def extract_pptx(path: Path) -> list[tuple[str, str]]:
+    for child in p:
+        if child.tag == W + "r":
+            runs = (child,)
+        elif child.tag == W + "hyperlink":
+            runs = (r for r in child if r.tag == W + "r")
+        else:
+            continue
+        for run in runs:
+            for elem in run:
+                tag = elem.tag
+                if tag == W + "t":
+                    parts.append(elem.text or "")
+                elif tag == W + "tab" or tag == W + "ptab":
+                    parts.append("\t")
+                elif tag == W + "br":
+                    if elem.get(W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif tag == W + "cr":
+                    parts.append("\n")
+                elif tag == W + "noBreakHyphen":
+                    parts.append("-")
+    return "".join(parts)
+
+
+def docx_table_rows(tbl) -> Iterator[list[str]]:
+    # Mirrors python-docx's row.cells: spanned cells repeat per grid column and
+    # vMerge="continue" cells repeat the cell above at the same grid offset.
+    above: dict[int, tuple[str, int]] = {}
+    for tr in tbl.iterchildren(W + "tr"):
+        before = tr.find(f"{W}trPr/{W}gridBefore")
+        offset = int(before.get(W + "val", 0)) if before is not None else 0
+        cells: list[str] = []
+        row: dict[int, tuple[str, int]] = {}
+        for tc in tr.iterchildren(W + "tc"):
+            span_elem = tc.find(f"{W}tcPr/{W}gridSpan")
+            span = int(span_elem.get(W + "val", 1)) if span_elem is not None else 1
+            vmerge = tc.find(f"{W}tcPr/{W}vMerge")
+            if vmerge is not None and vmerge.get(W + "val", "continue") == "continue" and offset in above:
+                cell = above[offset]
+            else:
+                text = "\n".join(docx_paragraph_text(p) for p in tc.iterchildren(W + "p"))
+                cell = (text.strip(), span)
+            row[offset] = cell
+            cells.extend([cell[0]] * cell[1])
+            offset += span
+        above = row
+        yield cells
+
+
+def iter_lines_docx(path: Path) -> Iterator[tuple[str, str]]:
+    from lxml import etree
+    # python-docx's parser settings: no entity expansion, no network access.
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    with zipfile.ZipFile(str(path), "r") as zf:
+        rels = etree.fromstring(zf.read("_rels/.rels"), parser)
+        target = next(
+            (rel.get("Target") for rel in rels if rel.get("Type") == DOCX_OFFICE_DOCUMENT_REL),
+            "word/document.xml",
+        )
+        with zf.open(target.lstrip("/")) as fp:
+            body = etree.parse(fp, parser).getroot().find(W + "body")
+    if body is None:
+        return
+    for p in body.iterchildren(W + "p"):
+        yield from nonblank_lines("document", docx_paragraph_text(p))
+    for tbl in body.iterchildren(W + "tbl"):
+        for cells in docx_table_rows(tbl):
+            if any(cells):
+                yield from nonblank_lines("document", "\t".join(cells))
+
+
+def iter_lines_pptx(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     from pptx import Presentation
-    sections = []
     prs = Presentation(str(path))
-    for i, slide in enumerate(prs.slides, 1):
-        parts = []
+    for i, slide in select_numbered(prs.slides, selection):
+        label = f"slide {i}"
         for shape in slide.shapes:
             if shape.has_text_frame:
                 for para in shape.text_frame.paragraphs:
-                    if para.text.strip():
-                        parts.append(para.text)
+                    yield from nonblank_lines(label, para.text)
             if shape.has_table:
                 for row in shape.table.rows:
                     cells = [cell.text.strip() for cell in row.cells]
-                    line = "\t".join(cells)
-                    if line.strip():
-                        parts.append(line)
-        if parts:
-            sections.append((f"slide {i}", "\n".join(parts)))
-    return sections
+                    if any(cells):
+                        yield from nonblank_lines(label, "\t".join(cells))
 
 
-def extract_xlsx(path: Path) -> list[tuple[str, str]]:
+def iter_lines_xlsx(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
+    # calamine is opt-in: it reads cached error values as blanks and numbers as floats, so it
+    # does not always render cells the way openpyxl does.
+    if os.environ.get(XLSX_READER_ENV, "").strip().lower() == "calamine":
+        try:
+            import python_calamine  # noqa: F401
+        except ImportError:
+            logger.warning(f"{XLSX_READER_ENV}=calamine but python-calamine is not installed, using openpyxl")
+        else:
+            return iter_lines_xlsx_calamine(path, selection)
+    return iter_lines_xlsx_openpyxl(path, selection)
+
+
+def used_width(row: tuple) -> int:
+    # Row width depends on the reader and on whether the sheet records a dimension, so trailing
+    # empty cells are dropped, as ODS rows already are.
+    n = len(row)
+    while n and (row[n - 1] is None or row[n - 1] == ""):
+        n -= 1
+    return n
+
+
+def calamine_cell_text(value) -> str:
+    # openpyxl's rendering for the usual cases: whole numbers are ints there, and date-only cells are midnight datetimes.
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    if type(value) is datetime.date:
+        return str(datetime.datetime.combine(value, datetime.time()))
+    return str(value)
+
+
+def iter_lines_xlsx_calamine(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
+    from python_calamine import CalamineWorkbook
+    wb = CalamineWorkbook.from_path(str(path))
+
+    def sheet_lines(sheet_name):
+        label = f"sheet '{sheet_name}'"
+        sheet = wb.get_sheet_by_name(sheet_name)
+        if sheet.start is None:
+            return
+        # calamine's range starts at the first used column; openpyxl rows start at column A.
+        pad = [""] * sheet.start[1]
+        for row in sheet.iter_rows():
+            width = used_width(row)
+            if width:
+                yield from nonblank_lines(label, "\t".join(pad + [calamine_cell_text(c) for c in row[:width]]))
+
+    try:
+        yield from select_sheets(((name, sheet_lines(name)) for name in wb.sheet_names), selection)
+    finally:
+        wb.close()
+
+
+def iter_lines_xlsx_openpyxl(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     from openpyxl import load_workbook
     wb = load_workbook(str(path), read_only=True, data_only=True)
-    sections = []
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        lines = []
-        for row in ws.iter_rows(values_only=True):
-            cells = [str(c) if c is not None else "" for c in row]
-            line = "\t".join(cells)
-            if line.strip():
-                lines.append(line)
-        if lines:
-            sections.append((f"sheet '{sheet_name}'", "\n".join(lines)))
-    wb.close()
-    return sections
+
+    def sheet_lines(sheet_name):
+        label = f"sheet '{sheet_name}'"
+        for row in wb[sheet_name].iter_rows(values_only=True):
+            width = used_width(row)
+            if width:
+                yield from nonblank_lines(label, "\t".join(["" if c is None else str(c) for c in row[:width]]))
+
+    try:
+        yield from select_sheets(((name, sheet_lines(name)) for name in wb.sheetnames), selection)
+    finally:
+        wb.close()
 
 
-def extract_odt(path: Path) -> list[tuple[str, str]]:
+def iter_lines_odt(path: Path) -> Iterator[tuple[str, str]]:
     from odf.opendocument import load
     from odf import text as odf_text, teletype
     doc = load(str(path))
-    parts = [teletype.extractText(p) for p in doc.getElementsByType(odf_text.P) if teletype.extractText(p).strip()]
-    if parts:
-        return [("document", "\n".join(parts))]
-    return []
+    for p in doc.getElementsByType(odf_text.P):
+        yield from nonblank_lines("document", teletype.extractText(p))
 
 
-def extract_ods(path: Path) -> list[tuple[str, str]]:
+def iter_lines_ods(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     from odf.opendocument import load
     from odf import table as odf_table, teletype, text as odf_text
     doc = load(str(path))
-    sections = []
-    for sheet in doc.getElementsByType(odf_table.Table):
-        sheet_name = sheet.getAttribute("name")
-        lines = []
+
+    def sheet_lines(sheet):
+        label = f"sheet '{sheet.getAttribute('name')}'"
         for row in sheet.getElementsByType(odf_table.TableRow):
+            # Runs of empty cells (LibreOffice pads rows with thousands) are only expanded when a value follows them.
             cells = []
+            pending_empty = 0
             for cell in row.getElementsByType(odf_table.TableCell):
                 repeat = int(cell.getAttribute("numbercolumnsrepeated") or 1)
                 value = teletype.extractText(cell).strip()
+                if not value:
+                    pending_empty += repeat
+                    continue
+                if pending_empty:
+                    cells.extend([""] * pending_empty)
+                    pending_empty = 0
                 cells.extend([value] * repeat)
-            line = "\t".join(cells).rstrip("\t")
-            if line.strip():
-                lines.append(line)
-        if lines:
-            sections.append((f"sheet '{sheet_name}'", "\n".join(lines)))
-    return sections
+            if cells:
+                yield from nonblank_lines(label, "\t".join(cells))
+
+    sheets = doc.getElementsByType(odf_table.Table)
+    yield from select_sheets(((sheet.getAttribute("name"), sheet_lines(sheet)) for sheet in sheets), selection)
 
 
-def extract_odp(path: Path) -> list[tuple[str, str]]:
+def iter_lines_odp(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     from odf.opendocument import load
     from odf import draw, teletype, text as odf_text
     doc = load(str(path))
-    sections = []
-    for i, page in enumerate(doc.getElementsByType(draw.Page), 1):
-        parts = [teletype.extractText(p) for p in page.getElementsByType(odf_text.P) if teletype.extractText(p).strip()]
-        if parts:
-            sections.append((f"slide {i}", "\n".join(parts)))
-    return sections
+    for i, page in select_numbered(doc.getElementsByType(draw.Page), selection):
+        for p in page.getElementsByType(odf_text.P):
+            yield from nonblank_lines(f"slide {i}", teletype.extractText(p))
 
 
-def extract_rtf(path: Path) -> list[tuple[str, str]]:
+def iter_lines_rtf(path: Path) -> Iterator[tuple[str, str]]:
     from striprtf.striprtf import rtf_to_text
     raw = path.read_bytes().decode("utf-8", errors="replace")
-    text = "\n".join(line for line in rtf_to_text(raw).splitlines() if line.strip())
-    if text:
-        return [("document", text)]
-    return []
+    yield from nonblank_lines("document", rtf_to_text(raw))
+
+
+class HTMLTextTarget:
+    # lxml parser target: collects text outside script/style from parse events, without building a tree.
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        self.parts = []
+        self.skip_depth = 0
+
+    def start(self, tag, attrib):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
 
+    def data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
 
-def extract_epub(path: Path) -> list[tuple[str, str]]:
-    tag_re = re.compile(r"<[^>]+>")
-    sections = []
+    def close(self) -> str:
+        return "".join(self.parts)
+
+
+def read_html_text(fp) -> str:
+    # Feeds the parser in chunks (the final empty one included) so a chapter is never held as one blob.
+    from lxml import etree
+    parser = etree.HTMLParser(target=HTMLTextTarget(), encoding="utf-8")
+    while True:
+        chunk = fp.read(EPUB_READ_CHUNK)
+        parser.feed(chunk)
+        if not chunk:
+            break
+    return parser.close()
+
+
+def iter_lines_epub(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     with zipfile.ZipFile(str(path), "r") as zf:
         container = ElementTree.fromstring(zf.read("META-INF/container.xml"))
         ns = {"c": "urn:oasis:names:tc:opendocument:xmlns:container"}
         opf_path = container.find(".//c:rootfile", ns).get("full-path")
         opf_dir = opf_path.rsplit("/", 1)[0] + "/" if "/" in opf_path else ""
-        opf = ElementTree.fromstring(zf.read(opf_path))
-        opf_ns = {"opf": "http://www.idpf.org/2007/opf"}
-        manifest = {item.get("id"): item.get("href") for item in opf.findall(".//opf:manifest/opf:item", opf_ns)}
-        spine_ids = [ref.get("idref") for ref in opf.findall(".//opf:spine/opf:itemref", opf_ns)]
-        for i, idref in enumerate(spine_ids, 1):
+        manifest = {}
+        spine_ids = []
+        # Only manifest items and spine itemrefs are needed, so elements are cleared as they close.
+        with zf.open(opf_path) as fp:
+            for _, elem in ElementTree.iterparse(fp, events=("end",)):
+                if elem.tag == OPF_ITEM_TAG:
+                    manifest[elem.get("id")] = elem.get("href")
+                elif elem.tag == OPF_ITEMREF_TAG:
+                    spine_ids.append(elem.get("idref"))
+                elem.clear()
+        for i, idref in select_numbered(spine_ids, selection):
             href = manifest.get(idref)
             if not href:
                 continue
             full_path = opf_dir + href if not href.startswith("/") else href.lstrip("/")
             try:
-                html = zf.read(full_path).decode("utf-8", errors="replace")
+                with zf.open(full_path) as fp:
+                    text = read_html_text(fp)
             except KeyError:
                 continue
-            text = tag_re.sub("", html)
-            lines = [l.strip() for l in text.splitlines() if l.strip()]
-            if lines:
-                sections.append((f"chapter {i}", "\n".join(lines)))
-    return sections
+            for label, line in nonblank_lines(f"chapter {i}", text):
+                yield label, line.strip()
 
 
-def extract_text(path: Path) -> list[tuple[str, str]]:
+def iter_lines(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
     extractors = {
-        ".pdf": extract_pdf, ".docx": extract_docx, ".pptx": extract_pptx, ".xlsx": extract_xlsx,
-        ".odt": extract_odt, ".ods": extract_ods, ".odp": extract_odp, ".rtf": extract_rtf, ".epub": extract_epub,
+        ".pdf": iter_lines_pdf, ".docx": iter_lines_docx, ".pptx": iter_lines_pptx, ".xlsx": iter_lines_xlsx,
+        ".odt": iter_lines_odt, ".ods": iter_lines_ods, ".odp": iter_lines_odp, ".rtf": iter_lines_rtf, ".epub": iter_lines_epub,
     }
     ext = path.suffix.lower()
     if ext not in extractors:
         raise ValueError(f"Unsupported file type: {ext}")
-    return extractors[ext](path)
+    if selection is None:
+        return extractors[ext](path)
+    if ext in LINE_RANGE_EXTENSIONS:
+        return islice(extractors[ext](path), selection.line_limit)
+    return extractors[ext](path, selection)
+
+
+def iter_sections(path: Path, selection: RangeSelection | None = None) -> Iterator[tuple[str, str]]:
+    for label, group in groupby(iter_lines(path, selection), key=itemgetter(0)):
+        yield label, "\n".join(line for _, line in group)
+
+
+def extract_text(path: Path, selection: RangeSelection | None = None) -> list[tuple[str, str]]:
+    return list(iter_sections(path, selection))
+
+
+def cache_key(path: Path) -> tuple[str, int, int]:
+    st = path.stat()
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def cache_store(key: tuple[str, int, int], sections: list[tuple[str, str]]) -> None:
+    # Bounded by entry count and by total text length, evicting least recently used extracts first.
+    global _section_cache_chars
+    size = sum(len(text) for _, text in sections)
+    if size > CACHE_MAX_CHARS:
+        return
+    if key in _section_cache:
+        _section_cache_chars -= _section_cache.pop(key)[1]
+    _section_cache[key] = (tuple(sections), size)
+    _section_cache_chars += size
+    while len(_section_cache) > CACHE_MAX_ENTRIES or _section_cache_chars > CACHE_MAX_TOTAL_CHARS:
+        _section_cache_chars -= _section_cache.popitem(last=False)[1][1]
+
+
+def cache_lookup(key: tuple[str, int, int]) -> tuple[tuple[str, str], ...] | None:
+    entry = _section_cache.get(key)
+    if entry is None:
+        return None
+    _section_cache.move_to_end(key)
+    return entry[0]
+
+
+def select_sheet_sections(sections: Iterable[tuple[str, str]], selection: RangeSelection) -> list[tuple[str, str]]:
+    # The sheets select_sheets would have kept, picked from a full extract where every section is a non-empty sheet.
+    return [
+        (label, text) for i, (label, text) in enumerate(sections, 1)
+        if i in selection.sheet_indices or label.removeprefix("sheet '").removesuffix("'") in selection.sheet_names
+    ]
+
+
+def extract_text_cached(path: Path, selection: RangeSelection | None = None) -> list[tuple[str, str]]:
+    # Keyed on mtime and size so edited files are re-parsed; oversized and partial extracts are not kept.
+    key = cache_key(path)
+    sections = cache_lookup(key)
+    if sections is not None:
+        if selection is not None and selection.ext in SHEET_EXTENSIONS:
+            return select_sheet_sections(sections, selection)
+        return list(sections)
+    if selection is not None:
+        return extract_text(path, selection)
+    sections = extract_text(path)
+    cache_store(key, sections)
+    return sections
+
+
+def iter_sections_cached(path: Path) -> Iterator[tuple[str, str]]:
+    # Only a fully consumed file is cached; stopping early (max_results) leaves the cache untouched.
+    key = cache_key(path)
+    sections = cache_lookup(key)
+    if sections is not None:
+        yield from sections
+        return
+    collected = []
+    size = 0
+    for section in iter_sections(path):
+        yield section
+        if collected is not None:
+            size += len(section[1])
+            if size > CACHE_MAX_CHARS:
+                collected = None
+            else:
+                collected.append(section)
+    if collected is not None:
+        cache_store(key, collected)
+
+
+def worker_count() -> int:
+    # Single-process unless DOCSEARCH_WORKERS is set; 0 picks one worker per core, up to 8.
+    value = os.environ.get(WORKERS_ENV, "").strip()
+    if not value:
+        return 1
+    try:
+        workers = int(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {WORKERS_ENV}={value!r}")
+        return 1
+    if workers <= 0:
+        return min(os.cpu_count() or 1, 8)
+    return workers
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None or _executor[0] != workers:
+        if _executor is not None:
+            _executor[1].shutdown(wait=False, cancel_futures=True)
+        # spawn, not fork: the stdio transport runs reader threads in this process.
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _executor = (workers, executor)
+    return _executor[1]
+
+
+def discard_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor[1].shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def extract_text_safe(path: Path) -> tuple[tuple[str, int, int] | None, list[tuple[str, str]] | None, str | None]:
+    # Runs in worker processes; errors come back as text since parser exceptions may not pickle.
+    try:
+        return cache_key(path), extract_text(path), None
+    except Exception as e:
+        return None, None, str(e)
+
+
+def sections_from_future(filepath: Path, future: Future) -> Iterator[tuple[str, str]]:
+    try:
+        key, sections, error = future.result()
+    except (BrokenProcessPool, CancelledError):
+        # Everything still in the window fails the same way once the pool breaks.
+        logger.error(f"Worker pool failed, reading {filepath} in-process")
+        discard_executor()
+        yield from iter_sections_cached(filepath)
+        return
+    if error is not None:
+        raise RuntimeError(error)
+    cache_store(key, sections)
+    yield from sections
+
+
+def iter_sections_parallel(files: Iterable[Path], workers: int) -> Iterator[tuple[Path, Iterator[tuple[str, str]]]]:
+    # Keeps at most 2 * workers files in flight and yields them in input order, so output matches the serial walk.
+    executor = get_executor(workers)
+    remaining = iter(files)
+    window: deque[tuple[Path, tuple[tuple[str, str], ...] | Future | None]] = deque()
+
+    def submit(count: int) -> None:
+        nonlocal executor
+        for filepath in islice(remaining, count):
+            try:
+                job = cache_lookup(cache_key(filepath))
+            except OSError:
+                job = None
+            if job is None and executor is not None:
+                try:
+                    job = executor.submit(extract_text_safe, filepath)
+                except (BrokenProcessPool, RuntimeError):
+                    # RuntimeError: the pool was already shut down after a failure seen by sections_from_future.
+                    logger.error("Worker pool failed, continuing in-process")
+                    discard_executor()
+                    executor = None
+            window.append((filepath, job))
+
+    try:
+        submit(workers * 2)
+        while window:
+            filepath, job = window.popleft()
+            submit(1)
+            if isinstance(job, Future):
+                yield filepath, sections_from_future(filepath, job)
+            elif job is not None:
+                yield filepath, iter(job)
+            else:
+                yield filepath, iter_sections_cached(filepath)
+    finally:
+        for _, job in window:
+            if isinstance(job, Future):
+                job.cancel()
+
+
+def iter_file_sections(files: Iterable[Path]) -> Iterator[tuple[Path, Iterator[tuple[str, str]]]]:
+    workers = worker_count()
+    if workers > 1:
+        yield from iter_sections_parallel(files, workers)
+        return
+    for filepath in files:
+        yield filepath, iter_sections_cached(filepath)
+
+
+def iter_document_files(directory: str, allowed_exts: set[str]) -> Iterator[Path]:
+    # Depth-first over name-sorted entries gives the same order as sorted(rglob("*")), but hidden
+    # directories are pruned instead of walked, and symlinked directories are not followed.
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except PermissionError:
+        return
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_document_files(entry.path, allowed_exts)
+        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in allowed_exts:
+            yield Path(entry.path)
 
 
 def parse_numeric_range(s: str) -> set[int]:
@@ -185,64 +635,168 @@ def parse_numeric_range(s: str) -> set[int]:
         part = part.strip()
         if "-" in part:
             start, end = part.split("-", 1)
-            nums.update(range(int(start), int(end) + 1))
+            start, end = int(start), int(end)
+            if start > end:
+                raise ValueError(f"Invalid range: {part}")
+            nums.update(range(start, end + 1))
         else:
             nums.add(int(part))
     return nums
 
 
 def extract_section_number(label: str) -> int | None:
-    m = re.match(r".*?(\d+)$", label)
-    return int(m.group(1)) if m else None
-
-
-def filter_sections(sections: list[tuple[str, str]], range_str: str, ext: str) -> tuple[str | None, list[tuple[str, str]]]:
-    if ext in (".docx", ".odt", ".rtf"):
-        line_range = parse_numeric_range(range_str)
+    i = len(label)
+    while i and label[i - 1].isdecimal():
+        i -= 1
+    return int(label[i:]) if i < len(label) else None
+
+
+def filter_sections(sections: list[tuple[str, str]], selection: RangeSelection) -> tuple[str | None, list[tuple[str, str]]]:
+    if selection.ext in LINE_RANGE_EXTENSIONS:
+        range_list = sorted(selection.line_range)
+        if not range_list:
+            return None, []
+        lo, hi = range_list[0], range_list[-1]
         filtered = []
         for label, text in sections:
             lines = text.split("\n")
-            selected = [lines[j - 1] for j in sorted(line_range) if 1 <= j <= len(lines)]
+            selected = [lines[j - 1] for j in range_list if 1 <= j <= len(lines)]
             if selected:
-                lo, hi = min(line_range), max(line_range)
                 filtered.append((f"{label} lines {lo}-{hi}", "\n".join(selected)))
         return None, filtered
 
-    if ext in (".xlsx", ".ods"):
-        names = set()
-        indices = set()
-        row_range = None
-        for part in range_str.split(","):
-            part = part.strip().strip("'\"")
-            if ":" in part:
-                sheet_part, row_part = part.split(":", 1)
-                row_range = parse_numeric_range(row_part)
-                part = sheet_part
-            try:
-                indices.add(int(part))
-            except ValueError:
-                if "-" not in part:
-                    names.add(part)
-                else:
-                    try:
-                        indices |= parse_numeric_range(part)
-                    except ValueError:
-                        names.add(part)
+    if selection.ext in SHEET_EXTENSIONS:
+        row_list = sorted(selection.line_range) if selection.line_range is not None else None
+        # The sections are already the selected sheets, see select_sheets and select_sheet_sections.
+        if row_list is None:
+            return None, list(sections)
+        if not row_list:
+            return None, []
         filtered = []
-        for i, (label, text) in enumerate(sections, 1):
-            sheet_name = label.removeprefix("sheet '").removesuffix("'")
-            if i in indices or sheet_name in names:
-                if row_range is not None:
-                    lines = text.split("\n")
-                    selected = [lines[j - 1] for j in sorted(row_range) if 1 <= j <= len(lines)]
-                    lo, hi = min(row_range), max(row_range)
-                    filtered.append((f"{label} rows {lo}-{hi}", "\n".join(selected)))
-                else:
-                    filtered.append((label, text))
+        for label, text in sections:
+            lines = text.split("\n")
+            selected = [lines[j - 1] for j in row_list if 1 <= j <= len(lines)]
+            filtered.append((f"{label} rows {row_list[0]}-{row_list[-1]}", "\n".join(selected)))
         return None, filtered
 
-    indices = parse_numeric_range(range_str)
-    return None, [(l, t) for l, t in sections if extract_section_number(l) in indices]
+    return None, [(l, t) for l, t in sections if extract_section_number(l) in selection.numbers]
+
+
+class LineMatcher:
+    def __init__(self, regex: re.Pattern):
+        self.regex = regex
+        # A whole-section scan lets negative lookarounds and \A/\Z see neighbouring lines, and a pattern
+        # that can consume a newline backtracks through the rest of the section from every failed start.
+        if regex.flags & re.DOTALL or LINE_SCOPED_PATTERN_RE.search(regex.pattern):
+            self.section_regex = None
+        else:
+            self.section_regex = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+
+    def matching_lines(self, text: str) -> Iterator[str]:
+        if self.section_regex is None:
+            for line in text.splitlines():
+                if self.regex.search(line):
+                    yield line
+            return
+        if not text:
+            return
+        pos = 0
+        while True:
+            m = self.section_regex.search(text, pos)
+            if m is None:
+                return
+            line_start = text.rfind("\n", 0, m.start()) + 1
+            if line_start == len(text):
+                return
+            line_end = text.find("\n", m.start())
+            if line_end == -1:
+                line_end = len(text)
+            # The section match may run past the line, so confirm per line and resume at the next one.
+            line = text[line_start:line_end]
+            if self.regex.search(line):
+                yield line
+            pos = line_end + 1
+            if pos > len(text):
+                return
+
+
+class HyperscanLineMatcher(LineMatcher):
+    # Hyperscan only decides whether a section can match at all: prefilter mode over-approximates
+    # the pattern and the first match stops the scan. Sections that pass go to LineMatcher.
+    # Its Unicode tables lag Python's, so only ASCII sections are gated.
+    def __init__(self, regex: re.Pattern, database, scan_terminated: type[Exception]):
+        super().__init__(regex)
+        self.database = database
+        self.scan_terminated = scan_terminated
+
+    def matching_lines(self, text: str) -> Iterator[str]:
+        if text.isascii():
+            hit = False
+
+            def on_match(pattern_id, start, end, flags, context):
+                nonlocal hit
+                hit = True
+                return 1
+
+            try:
+                self.database.scan(text.encode("ascii"), match_event_handler=on_match)
+            except self.scan_terminated:
+                pass
+            if not hit:
+                return
+        yield from super().matching_lines(text)
+
+
+class LiteralLineMatcher(LineMatcher):
+    # Patterns without metacharacters are located with str.find. lower() only agrees with
+    # re.IGNORECASE on ASCII, so other case-insensitive text goes through the regex.
+    def __init__(self, regex: re.Pattern):
+        super().__init__(regex)
+        self.ignore_case = bool(regex.flags & re.IGNORECASE)
+        self.needle = regex.pattern.lower() if self.ignore_case else regex.pattern
+
+    def matching_lines(self, text: str) -> Iterator[str]:
+        needle = self.needle
+        if not needle or "\n" in needle or (self.ignore_case and not (needle.isascii() and text.isascii())):
+            yield from super().matching_lines(text)
+            return
+        haystack = text.lower() if self.ignore_case else text
+        pos = 0
+        while True:
+            i = haystack.find(needle, pos)
+            if i == -1:
+                return
+            line_start = text.rfind("\n", 0, i) + 1
+            line_end = text.find("\n", i)
+            if line_end == -1:
+                line_end = len(text)
+            yield text[line_start:line_end]
+            pos = line_end + 1
+
+
+def compile_matcher(regex: re.Pattern) -> LineMatcher:
+    if not REGEX_METACHAR_RE.search(regex.pattern):
+        return LiteralLineMatcher(regex)
+    # Hyperscan reads the pattern as PCRE over the whole section, so skip syntax that means something
+    # else there ({,n}, [:class:], \A/\Z anchoring the section, \s/\S, which exclude \x1c-\x1f in
+    # PCRE) and non-ASCII patterns, whose case folding can disagree with re.
+    if not regex.pattern.isascii() or HYPERSCAN_UNSAFE_PATTERN_RE.search(regex.pattern):
+        return LineMatcher(regex)
+    try:
+        import hyperscan
+    except ImportError:
+        return LineMatcher(regex)
+    hs_flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_PREFILTER
+    hs_flags |= hyperscan.HS_FLAG_ALLOWEMPTY | hyperscan.HS_FLAG_SINGLEMATCH
+    if regex.flags & re.IGNORECASE:
+        hs_flags |= hyperscan.HS_FLAG_CASELESS
+    database = hyperscan.Database()
+    try:
+        database.compile(expressions=[regex.pattern.encode("utf-8")], flags=[hs_flags])
+    except hyperscan.error as e:
+        logger.debug(f"Hyperscan cannot compile {regex.pattern!r}, using re: {e}")
+        return LineMatcher(regex)
+    return HyperscanLineMatcher(regex, database, hyperscan.ScanTerminated)
 
 
 @mcp.tool()
@@ -263,38 +817,30 @@ def docgrep(
         regex = re.compile(pattern, flags)
     except re.error as e:
         raise ValueError(f"Invalid regex pattern: {e}")
+    matcher = compile_matcher(regex)
 
     allowed_exts = SUPPORTED_EXTENSIONS
     if file_types:
         allowed_exts = {ext if ext.startswith(".") else f".{ext}" for ext in file_types} & SUPPORTED_EXTENSIONS
 
     results = []
-    for filepath in sorted(root.rglob("*")):
-        if len(results) >= max_results:
-            break
-        if not filepath.is_file():
-            continue
-        if filepath.suffix.lower() not in allowed_exts:
-            continue
-        if any(part.startswith(".") for part in filepath.relative_to(root).parts):
-            continue
-
-        try:
-            sections = extract_text(filepath)
-        except Exception as e:
-            logger.error(f"Error extracting {filepath}: {e}")
-            results.append(f"{filepath.relative_to(root)}:error:{e}")
-            continue
-
-        for section_label, text in sections:
+    with closing(iter_file_sections(iter_document_files(str(root), allowed_exts))) as sources:
+        for filepath, sections in sources:
             if len(results) >= max_results:
                 break
-            for line in text.splitlines():
-                if len(results) >= max_results:
-                    break
-                if regex.search(line):
-                    rel = filepath.relative_to(root)
-                    results.append(f"{rel}:{section_label}:{line.strip()}")
+            rel = filepath.relative_to(root)
+            try:
+                for section_label, text in sections:
+                    prefix = f"{rel}:{section_label}:"
+                    for line in matcher.matching_lines(text):
+                        results.append(prefix + line.strip())
+                        if len(results) >= max_results:
+                            break
+                    if len(results) >= max_results:
+                        break
+            except Exception as e:
+                logger.error(f"Error extracting {filepath}: {e}")
+                results.append(f"{rel}:error:{e}")
 
     if not results:
         return "No matches found."
@@ -320,23 +866,37 @@ def docread(
     if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file type: {path.suffix}. Supported: {', '.join(sorted(SUPPORTED_EXTENSIONS))}")
 
-    sections = extract_text(path)
+    selection = RangeSelection(range, path.suffix.lower()) if range else None
+    sections = extract_text_cached(path, selection)
 
     warning = None
-    if range:
-        warning, sections = filter_sections(sections, range, path.suffix.lower())
+    if selection is not None:
+        warning, sections = filter_sections(sections, selection)
 
     if not sections:
         return "No text content found."
 
+    # Stop at the budget rather than building the whole document and slicing it; sections are
+    # separated by a blank line, so each prefix after the first carries the separator.
     output = []
+    running = 0
+    truncated = False
     if warning:
         output.append(warning + "\n")
+        running = len(output[0])
     for label, text in sections:
-        output.append(f"=== {label} ===\n{text}\n")
-    result = "\n".join(output)
-    if len(result) > MAX_OUTPUT_CHARS:
-        result = result[:MAX_OUTPUT_CHARS] + f"\n\n... output truncated at {MAX_OUTPUT_CHARS} chars. Use range to narrow results."
+        prefix = f"\n=== {label} ===\n" if output else f"=== {label} ===\n"
+        size = len(prefix) + len(text) + 1
+        if running + size > MAX_OUTPUT_CHARS:
+            remaining = MAX_OUTPUT_CHARS - running
+            output.append((prefix + text[:remaining])[:remaining])
+            truncated = True
+            break
+        output.append(f"{prefix}{text}\n")
+        running += size
+    result = "".join(output)
+    if truncated:
+        result += f"\n\n... output truncated at {MAX_OUTPUT_CHARS} chars. Use range to narrow results."
     return result
 
 
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+import pytest
+
+from docsearch import server
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(server, "_section_cache", OrderedDict())
+    monkeypatch.setattr(server, "_section_cache_chars", 0)
+
+
+@pytest.fixture
+def extract_calls(monkeypatch):
+    calls = []
+
+    def fake_extract_text(path, selection=None):
+        calls.append(path.name)
+        return [("document", path.read_text())]
+
+    monkeypatch.setattr(server, "extract_text", fake_extract_text)
+    return calls
+
+
+def make_files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"{i}.rtf"
+        path.write_text("x" * size)
+        paths.append(path)
+    return paths
+
+
+def test_unchanged_file_is_extracted_once(tmp_path, extract_calls):
+    (path,) = make_files(tmp_path, [10])
+    assert server.extract_text_cached(path) == server.extract_text_cached(path) == [("document", "x" * 10)]
+    assert extract_calls == ["0.rtf"]
+
+
+def test_edited_file_is_extracted_again(tmp_path, extract_calls):
+    (path,) = make_files(tmp_path, [10])
+    server.extract_text_cached(path)
+    path.write_text("y" * 11)
+    assert server.extract_text_cached(path) == [("document", "y" * 11)]
+    assert extract_calls == ["0.rtf", "0.rtf"]
+
+
+def test_oversized_extract_is_not_kept(tmp_path, extract_calls, monkeypatch):
+    monkeypatch.setattr(server, "CACHE_MAX_CHARS", 50)
+    (path,) = make_files(tmp_path, [51])
+    server.extract_text_cached(path)
+    server.extract_text_cached(path)
+    assert extract_calls == ["0.rtf", "0.rtf"]
+    assert server._section_cache_chars == 0
+
+
+def test_entry_count_evicts_least_recently_used(tmp_path, extract_calls, monkeypatch):
+    monkeypatch.setattr(server, "CACHE_MAX_ENTRIES", 2)
+    first, second, third = make_files(tmp_path, [1, 1, 1])
+    server.extract_text_cached(first)
+    server.extract_text_cached(second)
+    server.extract_text_cached(first)
+    server.extract_text_cached(third)
+    assert [key[0] for key in server._section_cache] == [str(first), str(third)]
+
+
+def test_total_text_length_evicts_least_recently_used(tmp_path, extract_calls, monkeypatch):
+    monkeypatch.setattr(server, "CACHE_MAX_TOTAL_CHARS", 250)
+    paths = make_files(tmp_path, [100, 100, 100])
+    for path in paths:
+        server.extract_text_cached(path)
+    assert [key[0] for key in server._section_cache] == [str(p) for p in paths[1:]]
+    assert server._section_cache_chars == 200
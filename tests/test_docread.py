@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+import pytest
+from openpyxl import Workbook
+
+from docsearch import server
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(server, "_section_cache", OrderedDict())
+    monkeypatch.setattr(server, "_section_cache_chars", 0)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name, rows in [("First", 5), ("Empty", 0), ("Second", 4), ("Third", 3)]:
+        ws = wb.create_sheet(name)
+        for i in range(1, rows + 1):
+            ws.append([f"{name.lower()}{i}"])
+    path = tmp_path / "book.xlsx"
+    wb.save(path)
+    return str(path)
+
+
+def read_cold_and_cached(path, range):
+    cold = server.docread(path, range)
+    server.docread(path)
+    assert server._section_cache
+    return cold, server.docread(path, range)
+
+
+@pytest.mark.parametrize("range,labels", [
+    ("2", ["sheet 'Second'"]),
+    ("3:1-2", ["sheet 'Third' rows 1-2"]),
+    ("Second:2-3", ["sheet 'Second' rows 2-3"]),
+    ("First,3", ["sheet 'First'", "sheet 'Third'"]),
+    ("1-2", ["sheet 'First'", "sheet 'Second'"]),
+    ("Empty", []),
+])
+def test_sheet_ranges_do_not_depend_on_the_cache(workbook, range, labels):
+    cold, cached = read_cold_and_cached(workbook, range)
+    assert cold == cached
+    assert [line[4:-4] for line in cold.splitlines() if line.startswith("=== ")] == labels
+
+
+def test_row_range_selects_rows(workbook):
+    assert server.docread(workbook, "Second:2-3") == "=== sheet 'Second' rows 2-3 ===\nsecond2\nsecond3\n"
+
+
+@pytest.mark.parametrize("range", ["2:5-3", "1:3-1"])
+def test_reversed_row_range_is_rejected_with_or_without_the_cache(workbook, range):
+    with pytest.raises(ValueError, match="Invalid range"):
+        server.docread(workbook, range)
+    server.docread(workbook)
+    with pytest.raises(ValueError, match="Invalid range"):
+        server.docread(workbook, range)
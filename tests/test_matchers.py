@@ -0,0 +1,100 @@
+import random
+import re
+
+import pytest
+
+from docsearch.server import LINE_SCOPED_PATTERN_RE, HyperscanLineMatcher, LineMatcher, LiteralLineMatcher, compile_matcher
+
+pytestmark = pytest.mark.filterwarnings("ignore:Possible nested set:FutureWarning")
+
+CASES = [
+    (r"\d+", "row 1\nrow\nrow 22"),
+    (r"a{,3}x", "xxx\nyyy"),
+    (r"x{,2}$", "abc\ndef"),
+    (r"unit\ssep", "unit\x1fsep here\nunit sep\nunitsep"),
+    (r"TODO[^!]*FIXME", "TODO one\nFIXME two\nTODO and FIXME\nTODO! FIXME"),
+    (r"^\s*$", "a\n\n  \nb"),
+    (r"^$", "a\n\nb\n"),
+    (r"\Aab", "ab\nxab\nab"),
+    (r"ab\Z", "ab\nabx\nxab"),
+    (r"(?!x)a", "xa\nx\nba"),
+    (r"(?s)a.b", "a\nb\naxb"),
+    (r"[[:alpha:]]", "a\n:]\nz"),
+    (r"i", "ı dotless\nplain\nnone"),
+    (r"s", "ſ long\nnone"),
+    (r"\w+", "café\n  \n٣"),
+    ("TODO", "todo\nTODO\ntoDo x\nnone"),
+    ("café", "CAFÉ\ncafe"),
+    ("", "a\n\nb"),
+    ("a b", "a b\nab\nA B"),
+]
+
+FRAGMENTS = [
+    "a", "b", "A", "\\d", "\\w", "\\s", "\\W", "\\S", "\\b", "\\B", ".", "^", "$", "*", "+", "?",
+    "{,2}", "{1,2}", "[ab]", "[^a]", "(", ")", "|", "(?i)", "\\.", " ", "\\A", "\\Z", "(a|b)", "\\1",
+    "-", "\t", "é", "ı", ":",
+]
+ALPHABET = "ab AB1x.-:\t!\x1féıſ"
+
+
+def per_line(regex, text):
+    return [line for line in text.splitlines() if regex.search(line)]
+
+
+@pytest.mark.parametrize("flags", [0, re.IGNORECASE])
+@pytest.mark.parametrize("pattern,text", CASES)
+def test_compile_matcher_matches_per_line_search(pattern, text, flags):
+    regex = re.compile(pattern, flags)
+    assert list(compile_matcher(regex).matching_lines(text)) == per_line(regex, text)
+
+
+@pytest.mark.parametrize("flags", [0, re.IGNORECASE])
+@pytest.mark.parametrize("pattern,text", CASES)
+def test_line_matcher_matches_per_line_search(pattern, text, flags):
+    regex = re.compile(pattern, flags)
+    assert list(LineMatcher(regex).matching_lines(text)) == per_line(regex, text)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_patterns_match_per_line_search(seed):
+    rng = random.Random(seed)
+    checked = 0
+    while checked < 150:
+        pattern = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 5)))
+        try:
+            regex = re.compile(pattern, rng.choice([0, re.IGNORECASE]))
+        except re.error:
+            continue
+        checked += 1
+        matchers = [LineMatcher(regex), compile_matcher(regex)]
+        for _ in range(3):
+            lines = ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 8))) for _ in range(rng.randint(1, 5))]
+            text = "\n".join(lines)
+            for matcher in matchers:
+                assert list(matcher.matching_lines(text)) == per_line(regex, text), (pattern, regex.flags, text)
+
+
+@pytest.mark.parametrize("pattern", [r"TODO[^!]*FIXME", r"a\sb", r"\W", r"\D", r"(?s)a.b", "a\\nb", r"(?!x)"])
+def test_newline_crossing_patterns_scan_per_line(pattern):
+    assert LineMatcher(re.compile(pattern)).section_regex is None
+
+
+def test_end_of_string_anchor_is_line_scoped():
+    # \z is only valid from Python 3.14, so check the pattern text rather than compiling it.
+    assert LINE_SCOPED_PATTERN_RE.search(r"x\z")
+
+
+@pytest.mark.parametrize("pattern", ["TODO", "a b", "café"])
+def test_literal_patterns_use_str_find(pattern):
+    assert isinstance(compile_matcher(re.compile(pattern)), LiteralLineMatcher)
+
+
+def test_hyperscan_gates_plain_regex():
+    pytest.importorskip("hyperscan")
+    assert isinstance(compile_matcher(re.compile(r"\d+", re.IGNORECASE)), HyperscanLineMatcher)
+
+
+@pytest.mark.parametrize("pattern", [r"a{,3}x", r"[[:alpha:]]", r"\Aab", r"ab\Z", r"unit\ssep", r"\S+x", "ı+"])
+def test_hyperscan_skips_patterns_it_reads_differently(pattern):
+    pytest.importorskip("hyperscan")
+    assert not isinstance(compile_matcher(re.compile(pattern)), HyperscanLineMatcher)
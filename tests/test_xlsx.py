@@ -0,0 +1,90 @@
+import datetime
+import re
+import zipfile
+
+import pytest
+from openpyxl import Workbook
+
+from docsearch import server
+
+
+def write_workbook(path, sheets):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name, cells in sheets.items():
+        ws = wb.create_sheet(name)
+        for (row, col), value in cells.items():
+            ws.cell(row=row, column=col, value=value)
+    wb.save(path)
+    return path
+
+
+def without_dimension(path):
+    # Many non-Excel writers omit <dimension>, which changes how wide openpyxl pads rows.
+    stripped = path.with_name(f"nodim-{path.name}")
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(stripped, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item)
+            if item.filename.startswith("xl/worksheets/"):
+                data = re.sub(rb"<dimension[^>]*/>", b"", data)
+            dst.writestr(item, data)
+    return stripped
+
+
+SHEETS = {
+    "sparse": {
+        "Wide": {(1, 1): "r1", (1, 200): "end", (2, 1): 2, (2, 4): "n2", (3, 3): "", (4, 2): "r4"},
+    },
+    "offset": {
+        "Offset": {(3, 3): "c3", (3, 5): "e3", (5, 4): "d5"},
+        "Empty": {},
+        "Second": {(1, 1): "s1"},
+    },
+    "values": {
+        "Values": {
+            (1, 1): 1, (1, 2): 2.5, (1, 3): True, (1, 4): datetime.datetime(2024, 1, 2, 3, 4, 5),
+            (1, 5): datetime.date(2024, 1, 2), (1, 6): "  pad  ", (2, 1): -0.1, (2, 2): 10**14, (2, 3): "text",
+        },
+    },
+}
+
+
+@pytest.fixture(params=sorted(SHEETS))
+def workbook(request, tmp_path):
+    return write_workbook(tmp_path / f"{request.param}.xlsx", SHEETS[request.param])
+
+
+def test_openpyxl_rows_do_not_depend_on_dimension(workbook):
+    lines = list(server.iter_lines_xlsx_openpyxl(workbook))
+    assert lines == list(server.iter_lines_xlsx_openpyxl(without_dimension(workbook)))
+    assert all(not line.endswith("\t") for _, line in lines)
+
+
+def test_sparse_rows_keep_leading_and_drop_trailing_empty_cells(tmp_path):
+    path = write_workbook(tmp_path / "sparse.xlsx", SHEETS["sparse"])
+    assert list(server.iter_lines_xlsx_openpyxl(path)) == [
+        ("sheet 'Wide'", "r1" + "\t" * 199 + "end"),
+        ("sheet 'Wide'", "2\t\t\tn2"),
+        ("sheet 'Wide'", "\tr4"),
+    ]
+
+
+def test_calamine_matches_openpyxl(workbook):
+    pytest.importorskip("python_calamine")
+    for path in (workbook, without_dimension(workbook)):
+        assert list(server.iter_lines_xlsx_calamine(path)) == list(server.iter_lines_xlsx_openpyxl(path))
+
+
+def test_error_cells_keep_openpyxl_text_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv(server.XLSX_READER_ENV, raising=False)
+    path = write_workbook(tmp_path / "errors.xlsx", {"OnlyErrors": {(1, 1): "#N/A", (2, 2): "#DIV/0!"}})
+    assert list(server.iter_lines_xlsx(path)) == [("sheet 'OnlyErrors'", "#N/A"), ("sheet 'OnlyErrors'", "\t#DIV/0!")]
+
+
+def test_calamine_reader_is_opt_in(workbook, monkeypatch):
+    pytest.importorskip("python_calamine")
+    monkeypatch.setenv(server.XLSX_READER_ENV, "calamine")
+    calls = []
+    monkeypatch.setattr(server, "iter_lines_xlsx_calamine", lambda path, selection=None: calls.append(path) or iter(()))
+    list(server.iter_lines_xlsx(workbook))
+    assert calls == [workbook]